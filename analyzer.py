@@ -4,6 +4,7 @@ from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
 from axe_selenium_python import Axe
 import config
+import raw_store
 
 def get_internal_links(base_url, limit):
     """Crawls a given URL to find a limited number of unique internal links."""
@@ -32,23 +33,35 @@ def get_internal_links(base_url, limit):
             break
     return list(internal_links)
 
-def analyze_page(driver, url):
-    """Analyzes a single page URL for WCAG compliance using the Axe engine."""
+def analyze_page(driver, url, base_url=None):
+    """
+    Analyzes a single page URL for WCAG compliance using the Axe engine.
+    If RAW_RESULTS_DIR is set, the raw results are also stored for replay.py.
+    """
+    page_url = url
     try:
         if not url.startswith(('http://', 'https://')):
             url = 'https://' + url
         print(f"  Navigating to: {url}")
         driver.set_page_load_timeout(config.TIMEOUT_SECONDS)
+        # axe.run() is an async script, so the page load timeout does not cover it.
+        driver.set_script_timeout(config.TIMEOUT_SECONDS)
         driver.get(url)
         time.sleep(5)
         axe = Axe(driver)
         axe.inject()
         results = axe.run()
-        return results
     except Exception as e:
         print(f"    Failed to analyze page {url}. Error: {e}")
         return None
 
+    if config.RAW_RESULTS_DIR and results:
+        try:
+            raw_store.save_raw_results(results, page_url, base_url)
+        except Exception as e:
+            print(f"    Warning: Could not store raw results for {url}. Error: {e}")
+    return results
+
 def process_analysis_results(results):
     """
     Processes Axe results to count violations, determine compliance level,
@@ -105,4 +118,22 @@ def process_analysis_results(results):
         'violations': counts,
         'severity': severity,
         'details': violation_details
-    }
\ No newline at end of file
+    }
+
+def build_summary_row(base_url, page_url, processed_data, timestamp):
+    """Builds an 'Accessibility_Scores' row from process_analysis_results output."""
+    v = processed_data['violations']
+    s = processed_data['severity']
+    return [
+        base_url, page_url, processed_data['highest_pass_level'], v['total'],
+        v['A'], v['AA'], v['AAA'], s['severe'], s['moderate'], s['mild'], s['unknown'],
+        timestamp
+    ]
+
+def build_detail_rows(base_url, page_url, processed_data):
+    """Builds the 'Violation_Details' rows from process_analysis_results output."""
+    return [
+        [base_url, page_url, detail.get('id'), detail.get('impact'),
+         detail.get('description'), detail.get('help_url')]
+        for detail in processed_data.get('details', [])
+    ]
\ No newline at end of file
@@ -0,0 +1,245 @@
+import contextlib
+import threading
+import time
+import config
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+def _driver_process(driver):
+    """Returns the psutil Process for a driver's chromedriver, or None if unavailable."""
+    if psutil is None:
+        return None
+    try:
+        return psutil.Process(driver.service.process.pid)
+    except Exception:
+        return None
+
+def get_driver_rss_mb(driver):
+    """Returns the combined RSS (in MB) of a driver's chromedriver and all its Chrome children."""
+    proc = _driver_process(driver)
+    if proc is None:
+        return 0.0
+    try:
+        processes = [proc] + proc.children(recursive=True)
+    except psutil.Error:
+        return 0.0
+    total = 0
+    for p in processes:
+        try:
+            total += p.memory_info().rss
+        except psutil.Error:
+            pass
+    return total / (1024 * 1024)
+
+def kill_driver(driver):
+    """
+    Force-kills a driver's chromedriver and every Chrome process under it.
+    Any thread blocked on this driver gets an exception instead of hanging forever.
+    """
+    proc = _driver_process(driver)
+    if proc is None:
+        # Without psutil we can only kill chromedriver itself; that is still
+        # enough to unblock the worker waiting on it.
+        try:
+            driver.service.process.kill()
+        except Exception:
+            pass
+        return
+    try:
+        children = proc.children(recursive=True)
+    except psutil.Error:
+        children = []
+    for p in children + [proc]:
+        try:
+            p.kill()
+        except psutil.Error:
+            pass
+
+class BrowserWatchdog:
+    """
+    Supervises the Chrome drivers of a parallel run from a background thread.
+
+    - Enforces a hard per-page deadline (page load AND axe execution) by killing
+      the driver of any page that runs past it.
+    - Flags drivers that grow past DRIVER_MAX_RSS_MB or have served
+      DRIVER_MAX_PAGES pages so their worker replaces them with a fresh one.
+    - Lowers the number of pages allowed to run at once while system memory is
+      under pressure, and raises it again once memory recovers.
+    """
+
+    def __init__(self, max_workers):
+        self.max_workers = max_workers
+        self.limit = max_workers
+        self.stats = {'killed_hung': 0, 'replaced_bloated': 0, 'recycled': 0, 'throttled': 0}
+        self.peak_python_rss_mb = 0.0
+        self._cond = threading.Condition()
+        self._running = 0
+        # Set once a page finishes after a concurrency cut; until then the memory
+        # held by in-flight pages hasn't had a chance to come back.
+        self._released_since_cut = True
+        self._drivers = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def start(self):
+        """Starts the background monitoring thread."""
+        if psutil is None:
+            print("Warning: 'psutil' is not installed. Memory checks are disabled; page deadlines still apply.")
+        self._thread = threading.Thread(target=self._run, name="browser-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stops monitoring and quits every driver still registered."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        with self._cond:
+            drivers = [state['driver'] for state in self._drivers.values()]
+            self._drivers.clear()
+        for driver in drivers:
+            self._quit(driver)
+
+    # --- Concurrency gate ---
+
+    def acquire_slot(self):
+        """Blocks until the current concurrency limit allows another page to run."""
+        with self._cond:
+            while self._running >= self.limit:
+                self._cond.wait()
+            self._running += 1
+
+    def release_slot(self, driver=None):
+        """
+        Frees a slot. If concurrency was lowered and there are now more live
+        browsers than allowed, the caller's driver is retired to give memory back.
+        """
+        with self._cond:
+            self._running -= 1
+            self._released_since_cut = True
+            shrink = driver is not None and len(self._drivers) > self.limit
+            self._cond.notify()
+        if shrink:
+            self.retire(driver)
+
+    # --- Driver lifecycle ---
+
+    def register(self, driver):
+        """Starts supervising a newly created driver."""
+        with self._cond:
+            self._drivers[id(driver)] = {'driver': driver, 'deadline': None, 'url': None, 'pages': 0,
+                                       'retire': False, 'killed': False}
+
+    def needs_replacement(self, driver):
+        """Returns True if the driver was killed, flagged as bloated, or is due for recycling."""
+        with self._cond:
+            state = self._drivers.get(id(driver))
+            if state is None or state['retire']:
+                return True
+            if state['pages'] >= config.DRIVER_MAX_PAGES:
+                self.stats['recycled'] += 1
+                return True
+            return False
+
+    def retire(self, driver):
+        """Stops supervising a driver and shuts it down. Safe to call more than once."""
+        with self._cond:
+            state = self._drivers.pop(id(driver), None)
+        if state is not None:
+            self._quit(driver)
+
+    @contextlib.contextmanager
+    def watch(self, driver, url):
+        """Context manager that puts a hard deadline on everything done to `url` inside it."""
+        with self._cond:
+            state = self._drivers.get(id(driver))
+            if state is not None:
+                state['deadline'] = time.monotonic() + config.PAGE_DEADLINE_SECONDS
+                state['url'] = url
+        try:
+            yield
+        finally:
+            with self._cond:
+                if state is not None:
+                    state['deadline'] = None
+                    state['url'] = None
+                    state['pages'] += 1
+
+    # --- Monitoring ---
+
+    def _run(self):
+        while not self._stop.wait(config.WATCHDOG_INTERVAL_SECONDS):
+            try:
+                self._check_deadlines()
+                self._check_memory()
+            except Exception as e:
+                print(f"\n  !! Watchdog check failed: {e}")
+
+    def _check_deadlines(self):
+        now = time.monotonic()
+        hung = []
+        with self._cond:
+            for state in self._drivers.values():
+                # Applies to bloated (already retiring) browsers too: they are the likeliest to hang.
+                if state['deadline'] is not None and now > state['deadline'] and not state['killed']:
+                    state['killed'] = True
+                    state['retire'] = True
+                    hung.append((state['driver'], state['url']))
+            self.stats['killed_hung'] += len(hung)
+        for driver, url in hung:
+            print(f"\n  !! Watchdog: {url} exceeded {config.PAGE_DEADLINE_SECONDS}s. Killing its browser.")
+            kill_driver(driver)
+
+    def _check_memory(self):
+        if psutil is None:
+            return
+        python_rss_mb = psutil.Process().memory_info().rss / (1024 * 1024)
+        self.peak_python_rss_mb = max(self.peak_python_rss_mb, python_rss_mb)
+        with self._cond:
+            states = list(self._drivers.values())
+        for state in states:
+            if state['retire']:
+                continue
+            rss_mb = get_driver_rss_mb(state['driver'])
+            if rss_mb > config.DRIVER_MAX_RSS_MB:
+                # Let the current page finish; the worker swaps the driver before its next page.
+                with self._cond:
+                    state['retire'] = True
+                    self.stats['replaced_bloated'] += 1
+                print(f"\n  !! Watchdog: browser using {rss_mb:.0f} MB. It will be replaced.")
+
+        used_percent = psutil.virtual_memory().percent
+        with self._cond:
+            if used_percent > config.MEMORY_PRESSURE_PERCENT:
+                # Cut one step at a time, and only after a page has finished since the last cut.
+                if self.limit > 1 and self._released_since_cut:
+                    self.limit -= 1
+                    self._released_since_cut = False
+                    self.stats['throttled'] += 1
+                    print(f"\n  !! Watchdog: system memory at {used_percent:.0f}%. Lowering concurrency to {self.limit}.")
+            elif used_percent < config.MEMORY_RECOVERY_PERCENT and self.limit < self.max_workers:
+                self.limit += 1
+                self._cond.notify()
+                print(f"\n  Watchdog: system memory at {used_percent:.0f}%. Raising concurrency to {self.limit}.")
+
+    def _quit(self, driver):
+        try:
+            driver.quit()
+        except Exception:
+            kill_driver(driver)
+
+    def report(self):
+        """Prints a one-line summary of what the watchdog did during the run."""
+        s = self.stats
+        print(f"Watchdog: {s['killed_hung']} hung browser(s) killed, {s['replaced_bloated']} bloated and "
+              f"{s['recycled']} worn-out browser(s) replaced, concurrency lowered {s['throttled']} time(s). "
+              f"Peak Python RSS: {self.peak_python_rss_mb:.0f} MB.")
@@ -20,7 +20,13 @@ from selenium.webdriver.chrome.service import Service as ChromeService
 from webdriver_manager.chrome import ChromeDriverManager
 from bs4 import BeautifulSoup
 import time
+import concurrent.futures
+import json
+import os
+import threading
 from urllib.parse import quote_plus
+import config
+import sheets_handler
 
 def setup_driver():
     """Initializes a headless Chrome WebDriver."""
@@ -85,9 +91,11 @@ def get_context_from_website_content(driver, url):
         print(f"  - Could not analyze page content. Error: {e}")
         return ""
 
-def get_sheet_as_df(spreadsheet, sheet_name, skiprows=0):
-    """Safely reads a worksheet into a pandas DataFrame."""
+def get_sheet_as_df(spreadsheet, sheet_name, skiprows=0, columns=None):
+    """Safely reads a worksheet into a pandas DataFrame, optionally downloading only `columns`."""
     try:
+        if columns is not None:
+            return pd.DataFrame(sheets_handler.read_columns(spreadsheet, sheet_name, columns, header_row=skiprows + 1))
         sheet = spreadsheet.worksheet(sheet_name)
         all_values = sheet.get_all_values()
         if len(all_values) <= skiprows: return pd.DataFrame()
@@ -98,6 +106,62 @@ def get_sheet_as_df(spreadsheet, sheet_name, skiprows=0):
     except Exception as e:
         print(f"Error reading sheet '{sheet_name}': {e}"); return None
 
+# Each worker thread of the classification pool reuses one browser.
+_thread_state = threading.local()
+_worker_drivers = []
+_worker_drivers_lock = threading.Lock()
+
+def fetch_context_task(url):
+    """Fetches a homepage's context on this worker thread's own browser."""
+    driver = getattr(_thread_state, 'driver', None)
+    if driver is None:
+        driver = setup_driver()
+        if not driver:
+            return ""
+        _thread_state.driver = driver
+        with _worker_drivers_lock:
+            _worker_drivers.append(driver)
+    return get_context_from_website_content(driver, url)
+
+def quit_worker_drivers():
+    """Closes every browser opened by the classification pool."""
+    with _worker_drivers_lock:
+        drivers = list(_worker_drivers)
+        _worker_drivers.clear()
+    for driver in drivers:
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+def load_context_cache():
+    """Loads the {homepage_url: context} cache saved by earlier runs."""
+    try:
+        with open(config.CONTEXT_CACHE_FILE, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        print(f"Warning: Could not read context cache, starting empty. Error: {e}")
+        return {}
+
+def save_context_cache(cache):
+    """Writes the context cache atomically so an interrupted run can't corrupt it."""
+    tmp_path = config.CONTEXT_CACHE_FILE + '.tmp'
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(cache, f)
+        os.replace(tmp_path, config.CONTEXT_CACHE_FILE)
+    except Exception as e:
+        print(f"Warning: Could not save context cache. Error: {e}")
+
+def classify_context(context, subsector_map):
+    """Returns the first sub-sector whose keywords appear in the context, or None."""
+    for sub_sector, keywords in subsector_map.items():
+        if any(keyword in context for keyword in keywords):
+            return sub_sector
+    return None
+
 def automate_subsector_classification():
     """
     Classifies websites by analyzing their homepage content and updates a
@@ -112,7 +176,8 @@ def automate_subsector_classification():
     except Exception as e:
         print(f"Error connecting to Google Sheets: {e}"); return
 
-    registry_df = get_sheet_as_df(spreadsheet, "Master_Website_Registry", skiprows=2)
+    registry_df = get_sheet_as_df(spreadsheet, "Master_Website_Registry", skiprows=2,
+                                  columns=['Website_URL (Home/Main)', 'Website_Name', 'Automated_Sub_Sector'])
     if registry_df is None or registry_df.empty:
         print("Could not load 'Master_Website_Registry'. Aborting."); return
     
@@ -142,56 +207,110 @@ def automate_subsector_classification():
         'Telecom Provider': ['telecom', 'mobile network', 'broadband', 'jio', 'airtel', 'vi'],
     }
 
-    driver = setup_driver()
-    if not driver: return
-    
     new_column_name = 'Automated_Sub_Sector'
     if new_column_name not in registry_df.columns:
         registry_df[new_column_name] = ''
 
     rows_to_classify = registry_df[registry_df[new_column_name].str.strip() == ''].index
     print(f"Found {len(rows_to_classify)} websites to classify.")
+    if len(rows_to_classify) == 0:
+        return
 
-    for index in rows_to_classify:
-        row = registry_df.loc[index]
-        url = row['Website_URL (Home/Main)']
-        name = row['Website_Name']
-        print(f"\nAnalyzing: {name}")
-        
-        context = get_context_from_website_content(driver, url)
-        if context:
-            classified = False
-            for sub_sector, keywords in subsector_map.items():
-                if any(keyword in context for keyword in keywords):
-                    registry_df.at[index, new_column_name] = sub_sector
-                    print(f"  -> Classified as: {sub_sector}")
-                    classified = True
-                    break
-            if not classified:
-                print("  -> No specific sub-sector matched.")
-    
-    driver.quit()
-    print(f"\nFinished analysis.")
-
-    # --- SAFELY UPDATE ONLY THE NEW COLUMN ---
+    # --- MAKE SURE THE NEW COLUMN EXISTS BEFORE ANY BATCH IS WRITTEN ---
     try:
-        print("Updating Google Sheet with new classifications...")
         header_list = registry_sheet.row_values(3)
         if new_column_name not in header_list:
             registry_sheet.update_cell(3, len(header_list) + 1, new_column_name)
             header_list.append(new_column_name)
-
         col_index = header_list.index(new_column_name) + 1
         col_letter = gspread.utils.rowcol_to_a1(1, col_index).rstrip('1')
-        
-        values_to_update = registry_df[[new_column_name]].values.tolist()
-        update_range = f'{col_letter}4:{col_letter}{len(registry_df) + 3}'
+    except Exception as e:
+        print(f"Could not prepare the '{new_column_name}' column: {e}"); return
+
+    # Rows sharing a homepage are fetched once. Homepages whose context is
+    # already cached from an earlier run skip the browser entirely.
+    context_cache = load_context_cache()
+    rows_by_url = {}
+    for index in rows_to_classify:
+        rows_by_url.setdefault(registry_df.at[index, 'Website_URL (Home/Main)'], []).append(index)
+    urls_to_fetch = [url for url in rows_by_url if url not in context_cache]
+    print(f"{len(rows_by_url) - len(urls_to_fetch)} homepage(s) already cached, "
+          f"fetching {len(urls_to_fetch)} with {config.NUM_WORKERS} parallel browsers.")
+
+    stage_times = {'fetch': 0.0, 'classify': 0.0, 'write': 0.0}
+    stage_counts = {'fetch': 0, 'classify': 0, 'write': 0}
+    pending_updates = []
 
-        registry_sheet.update(update_range, values_to_update)
+    def classify_rows(url, context):
+        start = time.perf_counter()
+        for index in rows_by_url[url]:
+            print(f"\nAnalyzing: {registry_df.at[index, 'Website_Name']}")
+            sub_sector = classify_context(context, subsector_map) if context else None
+            if sub_sector:
+                registry_df.at[index, new_column_name] = sub_sector
+                pending_updates.append({'range': f'{col_letter}{index + 4}', 'values': [[sub_sector]]})
+                print(f"  -> Classified as: {sub_sector}")
+            else:
+                print("  -> No specific sub-sector matched.")
+            stage_counts['classify'] += 1
+        stage_times['classify'] += time.perf_counter() - start
+
+    def flush(force=False):
+        if not pending_updates or (not force and len(pending_updates) < config.CLASSIFY_FLUSH_SIZE):
+            return
+        start = time.perf_counter()
+        try:
+            registry_sheet.batch_update(pending_updates)
+            stage_counts['write'] += len(pending_updates)
+            print(f"  Saved a batch of {len(pending_updates)} classifications.")
+            pending_updates.clear()
+        except Exception as e:
+            # Keep the rows pending; they are retried with the next flush.
+            print(f"An error occurred while saving a batch: {e}")
+        stage_times['write'] += time.perf_counter() - start
+
+    for url in rows_by_url:
+        if url in context_cache:
+            classify_rows(url, context_cache[url])
+    flush()
+
+    # The pool loop also classifies and writes; that time is already counted
+    # under those stages, so it is taken out of the fetch figure.
+    fetch_start = time.perf_counter()
+    other_stages_start = stage_times['classify'] + stage_times['write']
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=config.NUM_WORKERS) as executor:
+            future_to_url = {executor.submit(fetch_context_task, url): url for url in urls_to_fetch}
+            for future in concurrent.futures.as_completed(future_to_url):
+                url = future_to_url[future]
+                try:
+                    context = future.result()
+                except Exception as e:
+                    print(f"  - Could not analyze {url}. Error: {e}")
+                    context = ""
+                stage_counts['fetch'] += 1
+                if context:
+                    context_cache[url] = context
+                classify_rows(url, context)
+                flush()
+    finally:
+        other_stages_time = stage_times['classify'] + stage_times['write'] - other_stages_start
+        stage_times['fetch'] = time.perf_counter() - fetch_start - other_stages_time
+        quit_worker_drivers()
+        save_context_cache(context_cache)
+
+    flush(force=True)
+    print(f"\nFinished analysis.")
+    if pending_updates:
+        print(f"{len(pending_updates)} classification(s) could not be saved and will be redone on the next run.")
+    else:
         print("Successfully updated the 'Automated_Sub_Sector' column in your sheet.")
 
-    except Exception as e:
-        print(f"An error occurred while saving the data: {e}")
+    print("\nStage throughput:")
+    for stage in ('fetch', 'classify', 'write'):
+        seconds = stage_times[stage]
+        rate = stage_counts[stage] / seconds if seconds > 0 else 0.0
+        print(f"- {stage}: {stage_counts[stage]} item(s) in {seconds:.1f}s ({rate:.2f}/s)")
 
 if __name__ == "__main__":
     automate_subsector_classification()
\ No newline at end of file
@@ -1,12 +1,21 @@
 import gspread
 import pandas as pd
 from gspread_dataframe import set_with_dataframe
+import sheets_handler
 
-def get_sheet_as_df(spreadsheet, sheet_name, skiprows=0):
+def get_sheet_as_df(spreadsheet, sheet_name, skiprows=0, columns=None):
     """
     Safely reads a worksheet into a pandas DataFrame, allowing for rows to be skipped.
+    If `columns` is given, only those columns are downloaded.
     """
     try:
+        if columns is not None:
+            data = sheets_handler.read_columns(spreadsheet, sheet_name, columns, header_row=skiprows + 1)
+            df = pd.DataFrame(data)
+            if df.empty:
+                print(f"Warning: Worksheet '{sheet_name}' has no data rows to read after skipping.")
+            return df
+
         sheet = spreadsheet.worksheet(sheet_name)
         all_values = sheet.get_all_values()
         
@@ -32,30 +41,11 @@ def get_sheet_as_df(spreadsheet, sheet_name, skiprows=0):
         return None
 
 
-def cleanup_google_sheets_data():
+def build_cleanup_df(scores_df, registry_df):
     """
-    Connects to Google Sheets, processes accessibility data, and
-    creates a summarized 'Data_Cleanup' sheet.
+    Aggregates per-page scores into one summary row per website.
+    Returns None if the registry is missing the columns needed to name websites.
     """
-    # --- AUTHENTICATION ---
-    try:
-        gc = gspread.service_account(filename='credentials.json')
-        spreadsheet = gc.open("Master_Sheet_Main")
-        print("Successfully connected to your Google Sheet.")
-    except Exception as e:
-        print(f"Error connecting to Google Sheets: {e}")
-        return
-
-    # --- DATA LOADING ---
-    scores_df = get_sheet_as_df(spreadsheet, "Accessibility_Scores", skiprows=0)
-    registry_df = get_sheet_as_df(spreadsheet, "Master_Website_Registry", skiprows=2)
-
-    if scores_df is None or registry_df is None or scores_df.empty or registry_df.empty:
-        print("Aborting due to errors reading the worksheets or no data found.")
-        return
-        
-    print("Successfully loaded data from 'Accessibility_Scores' and 'Master_Website_Registry'.")
-
     # --- DATA PROCESSING ---
     url_col_registry = 'Website_URL (Home/Main)'
     name_col_registry = 'Website_Name'
@@ -63,7 +53,7 @@ def cleanup_google_sheets_data():
     if url_col_registry not in registry_df.columns or name_col_registry not in registry_df.columns:
         print(f"Error: Registry sheet must contain '{url_col_registry}' and '{name_col_registry}' columns.")
         print(f"Columns found in registry: {registry_df.columns.tolist()}")
-        return
+        return None
 
     registry_df_unique = registry_df.drop_duplicates(subset=[url_col_registry])
     url_to_name_map = pd.Series(
@@ -111,6 +101,11 @@ def cleanup_google_sheets_data():
         'Sub_Page': 'Subpages_Analyzed' # Rename the new count column
     }, inplace=True)
 
+    return cleanup_df
+
+
+def write_cleanup_sheet(spreadsheet, cleanup_df):
+    """Replaces the contents of the 'Data_Cleanup' sheet with the summary."""
     # --- SAVING TO GOOGLE SHEETS ---
     try:
         try:
@@ -138,6 +133,41 @@ def cleanup_google_sheets_data():
         print(f"An error occurred while saving the data: {e}")
 
 
+def cleanup_google_sheets_data():
+    """
+    Connects to Google Sheets, processes accessibility data, and
+    creates a summarized 'Data_Cleanup' sheet.
+    """
+    # --- AUTHENTICATION ---
+    try:
+        gc = gspread.service_account(filename='credentials.json')
+        spreadsheet = gc.open("Master_Sheet_Main")
+        print("Successfully connected to your Google Sheet.")
+    except Exception as e:
+        print(f"Error connecting to Google Sheets: {e}")
+        return
+
+    # --- DATA LOADING ---
+    scores_df = get_sheet_as_df(spreadsheet, "Accessibility_Scores", skiprows=0, columns=[
+        'Main_Website', 'Sub_Page', 'Ind_Compliance_Lvl',
+        'Total_Violation', 'Severe_Violation', 'Moderate_Violation', 'Mild_Violation'
+    ])
+    registry_df = get_sheet_as_df(spreadsheet, "Master_Website_Registry", skiprows=2,
+                                  columns=['Website_URL (Home/Main)', 'Website_Name'])
+
+    if scores_df is None or registry_df is None or scores_df.empty or registry_df.empty:
+        print("Aborting due to errors reading the worksheets or no data found.")
+        return
+        
+    print("Successfully loaded data from 'Accessibility_Scores' and 'Master_Website_Registry'.")
+
+    cleanup_df = build_cleanup_df(scores_df, registry_df)
+    if cleanup_df is None:
+        return
+
+    write_cleanup_sheet(spreadsheet, cleanup_df)
+
+
 # --- Run the cleanup process ---
 if __name__ == "__main__":
     cleanup_google_sheets_data()
\ No newline at end of file
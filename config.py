@@ -24,4 +24,75 @@ NUM_WORKERS = 4
 BATCH_SIZE = 20
 
 # Number of times to retry analyzing a page if it fails.
-RETRY_ATTEMPTS = 2
\ No newline at end of file
+RETRY_ATTEMPTS = 2
+
+# --- Browser Watchdog Settings (used by generate_violation_details.py) ---
+
+# Hard limit for a single page, covering both page load AND the axe run.
+# A browser still busy with a page after this long is killed and replaced.
+PAGE_DEADLINE_SECONDS = 120
+
+# A browser (chromedriver plus its Chrome processes) using more memory than this
+# is replaced with a fresh one after its current page.
+DRIVER_MAX_RSS_MB = 1500
+
+# Browsers are also recycled after this many pages, before slow leaks build up.
+DRIVER_MAX_PAGES = 50
+
+# When system memory use rises above this percentage, the number of pages
+# analyzed at once is lowered (down to 1) ...
+MEMORY_PRESSURE_PERCENT = 85
+# ... and raised again, up to NUM_WORKERS, once it falls below this percentage.
+MEMORY_RECOVERY_PERCENT = 70
+
+# How often, in seconds, the watchdog checks browsers and memory.
+WATCHDOG_INTERVAL_SECONDS = 5
+
+
+# --- Google Sheets Read Settings ---
+
+# Large sheets are read in chunks of this many rows, fetching only the columns
+# a script needs with one batched request per chunk.
+SHEETS_CHUNK_ROWS = 5000
+
+
+# --- Differential Re-Audit Settings (used by reaudit.py) ---
+
+# Only new, fixed and changed violations (plus an 'unchanged' marker per page)
+# are written here, instead of re-appending full results on every run.
+CHANGES_SHEET_NAME = "Violation_Changes"
+
+# One summary row per website per re-audit run.
+TRENDS_SHEET_NAME = "Site_Trends"
+
+
+# --- Sub-Sector Classification Settings (used by categorize.py) ---
+
+# Classified rows are written to the registry in batches of this size, so an
+# interrupted run keeps everything saved up to its last batch.
+CLASSIFY_FLUSH_SIZE = 25
+
+# Homepage text already extracted by earlier runs; cached homepages are
+# classified without opening a browser.
+CONTEXT_CACHE_FILE = "homepage_context_cache.json"
+
+
+# --- Work Scheduling Settings ---
+
+# Per-domain history of page load times and failures, used to order work so the
+# slowest pages start early instead of bunching up at the end of a run.
+DOMAIN_STATS_FILE = "domain_stats.json"
+
+# Assumed seconds per page for domains with no history yet.
+DEFAULT_PAGE_SECONDS = 20
+
+
+# --- Raw Result Storage & Replay Settings ---
+
+# Folder where analyze_page keeps every raw axe result (compressed and
+# content-addressed) so scores can be recomputed by replay.py without a browser.
+# Set to None to turn storage off.
+RAW_RESULTS_DIR = "raw_axe_results"
+
+# Number of processes replay.py uses. None means one per CPU core.
+REPLAY_WORKERS = None
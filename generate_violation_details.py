@@ -1,4 +1,6 @@
 import concurrent.futures
+import threading
+import time
 from tqdm import tqdm
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service as ChromeService
@@ -6,6 +8,8 @@ from webdriver_manager.chrome import ChromeDriverManager
 import config
 import sheets_handler
 import analyzer
+import browser_watchdog
+import scheduler
 
 def create_driver():
     """Initializes a single headless Chrome WebDriver instance."""
@@ -25,33 +29,58 @@ def create_driver():
         # This error will be caught by the worker and logged.
         return None
 
-def worker_task(page_url, base_url):
+# Each worker thread keeps its own browser between pages instead of starting
+# a new Chrome for every URL. The watchdog decides when it must be replaced.
+_thread_state = threading.local()
+
+def get_worker_driver(watchdog):
+    """Returns this thread's browser, replacing it first if the watchdog flagged it."""
+    driver = getattr(_thread_state, 'driver', None)
+    if driver is not None and watchdog.needs_replacement(driver):
+        watchdog.retire(driver)
+        driver = None
+    if driver is None:
+        driver = create_driver()
+        if driver:
+            watchdog.register(driver)
+        _thread_state.driver = driver
+    return driver
+
+def worker_task(page_url, base_url, watchdog, domain_stats=None):
     """
-    The task for a single worker thread. It creates its own driver, analyzes
-    a page with retries, and returns the results.
+    The task for a single worker thread. It waits for a free slot, analyzes
+    a page with retries on its (supervised) browser, and returns the results.
+    The page load and axe time and the outcome are recorded in `domain_stats` if given.
     """
-    driver = create_driver()
-    if not driver:
-        return page_url, None # Return failure if driver fails
-
-    for attempt in range(config.RETRY_ATTEMPTS):
-        analysis_results = analyzer.analyze_page(driver, page_url)
-        if analysis_results:
-            processed_data = analyzer.process_analysis_results(analysis_results)
-            if 'error' not in processed_data:
-                details_to_log = []
-                for detail in processed_data.get('details', []):
-                    details_to_log.append([
-                        base_url, page_url, detail.get('id'), detail.get('impact'),
-                        detail.get('description'), detail.get('help_url')
-                    ])
-                driver.quit()
-                return page_url, details_to_log
-        # If analysis fails, wait a moment before retrying
-        time.sleep(2)
-
-    driver.quit()
-    return page_url, None # Return None on persistent failure
+    watchdog.acquire_slot()
+    driver = None
+    page_seconds = None
+    details_to_log = None
+    try:
+        for attempt in range(config.RETRY_ATTEMPTS):
+            driver = get_worker_driver(watchdog)
+            if not driver:
+                return page_url, None # Return failure if driver fails
+
+            # Timed after get_worker_driver() so browser startup isn't charged to the page's domain.
+            attempt_start = time.monotonic()
+            with watchdog.watch(driver, page_url):
+                analysis_results = analyzer.analyze_page(driver, page_url, base_url)
+            page_seconds = (page_seconds or 0.0) + time.monotonic() - attempt_start
+            if analysis_results:
+                processed_data = analyzer.process_analysis_results(analysis_results)
+                if 'error' not in processed_data:
+                    details_to_log = analyzer.build_detail_rows(base_url, page_url, processed_data)
+                    return page_url, details_to_log
+            # If analysis fails, wait a moment before retrying
+            time.sleep(2)
+
+        return page_url, None # Return None on persistent failure
+    finally:
+        # Nothing is recorded if no browser could be started: that says nothing about the domain.
+        if domain_stats is not None and page_seconds is not None:
+            domain_stats.record(page_url, page_seconds, details_to_log is not None)
+        watchdog.release_slot(driver)
 
 def main():
     """
@@ -79,14 +108,21 @@ def main():
         return
         
     print(f"Proceeding to analyze {len(pages_to_analyze)} missing pages using {config.NUM_WORKERS} parallel workers.")
+
+    # Homepages first, then the slowest domains, spread across hosts.
+    domain_stats = scheduler.DomainStats().load()
+    work_queue = scheduler.order_pages(pages_to_analyze, domain_stats)
     
     results_batch = []
     failed_pages = []
 
-    # Using ThreadPoolExecutor for I/O-bound tasks like web browsing
-    with concurrent.futures.ThreadPoolExecutor(max_workers=config.NUM_WORKERS) as executor:
-        # Prepare future tasks
-        future_to_url = {executor.submit(worker_task, url, base): url for url, base in pages_to_analyze.items()}
+    # Using ThreadPoolExecutor for I/O-bound tasks like web browsing.
+    # The watchdog enforces page deadlines, replaces stuck or bloated browsers
+    # and lowers concurrency when memory runs low.
+    with browser_watchdog.BrowserWatchdog(config.NUM_WORKERS) as watchdog, \
+            concurrent.futures.ThreadPoolExecutor(max_workers=config.NUM_WORKERS) as executor:
+        # Prepare future tasks; the executor starts them in submission order
+        future_to_url = {executor.submit(worker_task, url, base, watchdog, domain_stats): url for url, base in work_queue}
         
         # Process results as they complete, with a progress bar
         for future in tqdm(concurrent.futures.as_completed(future_to_url), total=len(pages_to_analyze), desc="Analyzing Pages"):
@@ -103,6 +139,7 @@ def main():
                     print(f"\nWriting a batch of {len(results_batch)} violation details to Google Sheets...")
                     sheets_handler.append_violation_details(g_client, results_batch)
                     results_batch = [] # Reset the batch
+                    domain_stats.save()
 
             except Exception as exc:
                 failed_pages.append(page_url)
@@ -113,7 +150,9 @@ def main():
         print(f"\nWriting the final batch of {len(results_batch)} violation details...")
         sheets_handler.append_violation_details(g_client, results_batch)
 
+    domain_stats.save()
     print("\nViolation details generation complete.")
+    watchdog.report()
     if failed_pages:
         print("\nThe following pages failed to analyze after multiple attempts and should be reviewed manually:")
         for url in failed_pages:
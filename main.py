@@ -78,29 +78,19 @@ def main():
         print(f"  Proceeding to audit {len(pages_to_check)} new page(s).")
 
         for page_url in pages_to_check:
-            analysis_results = analyzer.analyze_page(driver, page_url)
+            analysis_results = analyzer.analyze_page(driver, page_url, base_url)
             if analysis_results:
                 processed_data = analyzer.process_analysis_results(analysis_results)
                 if 'error' in processed_data:
                     print(f"    Could not process analysis results for {page_url}."); continue
 
                 v = processed_data['violations']
-                s = processed_data['severity']
                 print(f"    Compliance: {processed_data['highest_pass_level']} | Total WCAG Violations: {v['total']}")
                 
                 # Prepare data for both sheets
-                summary_row_data = [
-                    base_url, page_url, processed_data['highest_pass_level'], v['total'],
-                    v['A'], v['AA'], v['AAA'], s['severe'], s['moderate'], s['mild'], s['unknown'],
-                    datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                ]
-                
-                violation_details_to_log = []
-                for detail in processed_data.get('details', []):
-                    violation_details_to_log.append([
-                        base_url, page_url, detail.get('id'), detail.get('impact'),
-                        detail.get('description'), detail.get('help_url')
-                    ])
+                timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                summary_row_data = analyzer.build_summary_row(base_url, page_url, processed_data, timestamp)
+                violation_details_to_log = analyzer.build_detail_rows(base_url, page_url, processed_data)
 
                 # --- ATOMIC WRITING BLOCK ---
                 # Try to write to both sheets. If either fails, the error is logged
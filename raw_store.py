@@ -0,0 +1,84 @@
+import datetime
+import gzip
+import hashlib
+import json
+import os
+import threading
+import config
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Worker threads append to the same index file.
+_index_lock = threading.Lock()
+
+def _object_path(root, digest, extension):
+    return os.path.join(root, 'objects', digest[:2], digest + extension)
+
+def save_raw_results(results, page_url, base_url=None, root=None):
+    """
+    Stores raw axe results compressed (zstd if available, else gzip) under the
+    SHA-256 of their canonical JSON, so identical results are stored only once,
+    and records the page in the index. Returns the digest.
+    """
+    root = root or config.RAW_RESULTS_DIR
+    data = json.dumps(results, sort_keys=True, separators=(',', ':')).encode('utf-8')
+    digest = hashlib.sha256(data).hexdigest()
+
+    if not any(os.path.exists(_object_path(root, digest, ext)) for ext in ('.json.zst', '.json.gz')):
+        if zstandard is not None:
+            path, compressed = _object_path(root, digest, '.json.zst'), zstandard.ZstdCompressor(level=10).compress(data)
+        else:
+            path, compressed = _object_path(root, digest, '.json.gz'), gzip.compress(data, mtime=0)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(compressed)
+        os.replace(tmp_path, path)
+
+    entry = {
+        'sha256': digest,
+        'sub_page': page_url,
+        'main_website': base_url,
+        'audited_at': datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    with _index_lock:
+        with open(os.path.join(root, 'index.jsonl'), 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry) + '\n')
+    return digest
+
+def load_raw_results(digest, root=None):
+    """Loads and decompresses the raw axe results stored under a digest."""
+    root = root or config.RAW_RESULTS_DIR
+    path = _object_path(root, digest, '.json.zst')
+    if os.path.exists(path):
+        if zstandard is None:
+            raise RuntimeError(f"'{path}' is zstd-compressed but the 'zstandard' package is not installed.")
+        with open(path, 'rb') as f:
+            return json.loads(zstandard.ZstdDecompressor().decompress(f.read()))
+    with gzip.open(_object_path(root, digest, '.json.gz'), 'rb') as f:
+        return json.loads(f.read())
+
+def latest_entries(root=None):
+    """
+    Reads the index and returns the most recent entry for every page,
+    sorted by page URL so replays always process pages in the same order.
+    """
+    root = root or config.RAW_RESULTS_DIR
+    latest = {}
+    try:
+        with open(os.path.join(root, 'index.jsonl'), encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue # A line cut short by an interrupted run
+                latest[entry['sub_page']] = entry
+    except FileNotFoundError:
+        return []
+    return [latest[page] for page in sorted(latest)]
@@ -0,0 +1,191 @@
+import concurrent.futures
+import datetime
+import json
+import time
+from tqdm import tqdm
+import config
+import sheets_handler
+import browser_watchdog
+import scheduler
+from generate_violation_details import worker_task
+
+def diff_page(base_url, page_url, previous, details_rows, timestamp):
+    """
+    Compares a page's fresh violation rows (as produced by worker_task) with its
+    last stored {violation_id: severity} set.
+    Returns the change rows to write and a dict of change counts. A page with no
+    changes gets a single 'unchanged' marker row.
+    """
+    current = {}
+    for _, _, violation_id, impact, description, help_url in details_rows:
+        current[violation_id] = (impact or '', description, help_url)
+
+    rows = []
+    counts = {'new': 0, 'fixed': 0, 'changed': 0, 'open': len(current)}
+    for violation_id, (severity, description, help_url) in current.items():
+        if violation_id not in previous:
+            rows.append([base_url, page_url, violation_id, 'new', severity, '', description, help_url, timestamp])
+            counts['new'] += 1
+        elif previous[violation_id] != severity:
+            rows.append([base_url, page_url, violation_id, 'changed', severity, previous[violation_id],
+                         description, help_url, timestamp])
+            counts['changed'] += 1
+    for violation_id, severity in previous.items():
+        if violation_id not in current:
+            rows.append([base_url, page_url, violation_id, 'fixed', '', severity, '', '', timestamp])
+            counts['fixed'] += 1
+
+    if not rows:
+        rows.append([base_url, page_url, '', 'unchanged', '', '', '', '', timestamp])
+    return rows, counts
+
+def build_trend_rows(site_trends, timestamp):
+    """Turns the per-site change counts collected during the run into one summary row per site."""
+    trend_rows = []
+    for base_url, t in sorted(site_trends.items()):
+        net_change = t['new'] - t['fixed']
+        trend_rows.append([
+            base_url, t['pages'], t['pages_changed'], t['new'], t['fixed'], t['changed'],
+            t['open'], net_change, timestamp
+        ])
+    return trend_rows
+
+def append_with_retry(append_fn, g_client, rows, attempts=3):
+    """Calls a sheets_handler append function, retrying with a growing pause. Re-raises the last error."""
+    for attempt in range(attempts):
+        try:
+            append_fn(g_client, rows)
+            return
+        except Exception:
+            if attempt == attempts - 1:
+                raise
+            time.sleep(5 * (attempt + 1))
+
+def dump_pending_rows(pending, timestamp):
+    """
+    Saves rows that could not be written to Google Sheets to a local JSON file
+    ({sheet_name: rows}), so a finished re-audit is never lost to a write error.
+    """
+    path = f"reaudit_pending_{timestamp.replace('-', '').replace(':', '').replace(' ', '_')}.json"
+    try:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(pending, f, indent=1)
+        print(f"\n!! Some rows could not be saved to Google Sheets. They were written to '{path}'; "
+              f"append them to the named sheets before the next re-audit.")
+    except Exception as e:
+        print(f"\n!! CRITICAL: Could not save pending rows either ({e}). Rows follow:")
+        print(json.dumps(pending))
+
+def main():
+    """
+    Re-audits every scored page and records only what changed since the last
+    stored result, plus a per-site trend summary, instead of re-appending
+    full results.
+    """
+    print("Starting differential re-audit...")
+    g_client = sheets_handler.setup_client()
+    if not g_client: return
+
+    sheets_handler.setup_diff_sheets(g_client)
+
+    pages_to_audit = sheets_handler.get_scored_pages_map(g_client)
+    if not pages_to_audit:
+        print("No pages found in 'Accessibility_Scores' to re-audit. Exiting."); return
+
+    last_results = sheets_handler.get_last_violation_sets(g_client)
+    if last_results is None:
+        print("Could not load the previous results. Aborting so no false changes are recorded."); return
+    last_violation_sets, baselined_pages = last_results
+
+    print(f"Re-auditing {len(pages_to_audit)} pages using {config.NUM_WORKERS} parallel workers.")
+    domain_stats = scheduler.DomainStats().load()
+    work_queue = scheduler.order_pages(pages_to_audit, domain_stats)
+    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    changes_batch = []
+    details_batch = []
+    baseline_pages = []
+    failed_pages = []
+    site_trends = {}
+
+    with browser_watchdog.BrowserWatchdog(config.NUM_WORKERS) as watchdog, \
+            concurrent.futures.ThreadPoolExecutor(max_workers=config.NUM_WORKERS) as executor:
+        future_to_url = {executor.submit(worker_task, url, base, watchdog, domain_stats): url for url, base in work_queue}
+
+        for future in tqdm(concurrent.futures.as_completed(future_to_url), total=len(pages_to_audit), desc="Re-auditing Pages"):
+            page_url = future_to_url[future]
+            base_url = pages_to_audit[page_url]
+            try:
+                _, details_rows = future.result()
+                if details_rows is None:
+                    failed_pages.append(page_url); continue
+
+                if page_url not in baselined_pages:
+                    # No stored result to compare with: record this one as the page's
+                    # baseline instead of reporting all of its violations as new.
+                    changes_batch.append([base_url, page_url, '', 'baseline', '', '', '', '', timestamp])
+                    details_batch.extend(details_rows)
+                    baseline_pages.append(page_url)
+                    continue
+
+                rows, counts = diff_page(base_url, page_url, last_violation_sets.get(page_url, {}), details_rows, timestamp)
+                changes_batch.extend(rows)
+
+                t = site_trends.setdefault(base_url, {'pages': 0, 'pages_changed': 0, 'new': 0, 'fixed': 0, 'changed': 0, 'open': 0})
+                t['pages'] += 1
+                t['pages_changed'] += 1 if counts['new'] or counts['fixed'] or counts['changed'] else 0
+                for key in ('new', 'fixed', 'changed', 'open'):
+                    t[key] += counts[key]
+
+            except Exception as exc:
+                failed_pages.append(page_url)
+                print(f"\n{page_url} generated an exception: {exc}")
+
+            if len(changes_batch) >= config.BATCH_SIZE:
+                # Details go first: a 'baseline' marker must never exist without them.
+                # On error the rows stay batched and are retried with the next flush.
+                try:
+                    sheets_handler.append_violation_details(g_client, details_batch)
+                    details_batch = []
+                    sheets_handler.append_violation_changes(g_client, changes_batch)
+                    changes_batch = []
+                except Exception as exc:
+                    print(f"\nCould not save a batch of changes, will retry: {exc}")
+                domain_stats.save()
+
+    # --- FINAL WRITES: never lose a finished run to one Sheets error ---
+    pending = {}
+    try:
+        append_with_retry(sheets_handler.append_violation_details, g_client, details_batch)
+        details_batch = []
+        append_with_retry(sheets_handler.append_violation_changes, g_client, changes_batch)
+        changes_batch = []
+    except Exception:
+        if details_batch:
+            pending["Violation_Details"] = details_batch
+        pending[config.CHANGES_SHEET_NAME] = changes_batch
+
+    domain_stats.save()
+    trend_rows = build_trend_rows(site_trends, timestamp)
+    try:
+        append_with_retry(sheets_handler.append_site_trends, g_client, trend_rows)
+    except Exception:
+        pending[config.TRENDS_SHEET_NAME] = trend_rows
+    if pending:
+        dump_pending_rows(pending, timestamp)
+
+    print("\nDifferential re-audit complete.")
+    watchdog.report()
+    if baseline_pages:
+        print(f"{len(baseline_pages)} page(s) had no stored result; their results were saved as a baseline "
+              f"and left out of the trend counts.")
+    print("\nPer-site trend (new / fixed / changed, open violations):")
+    for row in trend_rows:
+        print(f"- {row[0]}: +{row[3]} / -{row[4]} / ~{row[5]}, {row[6]} open ({row[2]} of {row[1]} pages changed)")
+    if failed_pages:
+        print("\nThe following pages failed to analyze and were left out of this comparison:")
+        for url in failed_pages:
+            print(f"- {url}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+import concurrent.futures
+import os
+import time
+import config
+import sheets_handler
+import analyzer
+import raw_store
+import cleanup_sheets
+
+# Used only when the sheets don't exist yet; otherwise their own header is kept.
+SCORES_HEADER = ['Main_Website', 'Sub_Page', 'Ind_Compliance_Lvl', 'Total_Violation', 'A_Violation',
+                 'AA_Violation', 'AAA_Violation', 'Severe_Violation', 'Moderate_Violation',
+                 'Mild_Violation', 'Unknown_Violation', 'Timestamp']
+DETAILS_HEADER = ['Main_Website', 'Sub_Page', 'Violation_ID', 'Severity', 'Description', 'Help_URL']
+
+def replay_entry(entry):
+    """
+    Runs one stored raw axe result through process_analysis_results.
+    Executed in a worker process; returns (sub_page, summary_row, detail_rows),
+    with None rows if the stored result can't be processed.
+    """
+    base_url, page_url = entry['main_website'], entry['sub_page']
+    try:
+        results = raw_store.load_raw_results(entry['sha256'])
+    except Exception as e:
+        print(f"  Could not load raw results for {page_url}. Error: {e}")
+        return page_url, None, None
+    processed_data = analyzer.process_analysis_results(results)
+    if 'error' in processed_data:
+        return page_url, None, None
+    summary_row = analyzer.build_summary_row(base_url, page_url, processed_data, entry['audited_at'])
+    detail_rows = analyzer.build_detail_rows(base_url, page_url, processed_data)
+    return page_url, summary_row, detail_rows
+
+def main():
+    """
+    Recomputes 'Accessibility_Scores', 'Violation_Details' and 'Data_Cleanup'
+    from the raw axe results stored by analyze_page, without opening a browser.
+    Pages are processed in parallel across CPU cores and written in a fixed
+    order, so replaying the same store twice gives the same sheets.
+    """
+    print("Starting replay of stored axe results...")
+    entries = raw_store.latest_entries()
+    if not entries:
+        print(f"No stored results found in '{config.RAW_RESULTS_DIR}'. Exiting."); return
+
+    g_client = sheets_handler.setup_client()
+    if not g_client: return
+
+    # Results stored without their main website get it from 'Accessibility_Scores'.
+    if any(not entry['main_website'] for entry in entries):
+        scored_pages = sheets_handler.get_scored_pages_map(g_client)
+        for entry in entries:
+            entry['main_website'] = entry['main_website'] or scored_pages.get(entry['sub_page'])
+        missing = [entry['sub_page'] for entry in entries if not entry['main_website']]
+        if missing:
+            print(f"Skipping {len(missing)} stored page(s) with no known main website.")
+        entries = [entry for entry in entries if entry['main_website']]
+
+    workers = config.REPLAY_WORKERS or os.cpu_count()
+    print(f"Replaying {len(entries)} pages using {workers} processes.")
+    start = time.perf_counter()
+    summary_rows, detail_rows, replayed_pages, failed_pages = [], [], set(), []
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        # map() keeps the input order, which latest_entries() has already sorted.
+        chunksize = max(1, len(entries) // (workers * 4))
+        for page_url, summary_row, page_details in executor.map(replay_entry, entries, chunksize=chunksize):
+            if summary_row is None:
+                failed_pages.append(page_url); continue
+            replayed_pages.add(page_url)
+            summary_rows.append(summary_row)
+            detail_rows.extend(page_details)
+    print(f"Processed {len(replayed_pages)} pages in {time.perf_counter() - start:.1f}s.")
+
+    try:
+        kept = sheets_handler.rewrite_page_sheet(g_client, "Accessibility_Scores", SCORES_HEADER, summary_rows, replayed_pages)
+        print(f"Rewrote 'Accessibility_Scores' ({len(summary_rows)} replayed, {kept} kept without stored results).")
+        kept = sheets_handler.rewrite_page_sheet(g_client, "Violation_Details", DETAILS_HEADER, detail_rows, replayed_pages)
+        print(f"Rewrote 'Violation_Details' ({len(detail_rows)} replayed, {kept} kept without stored results).")
+    except Exception as e:
+        print(f"An error occurred while saving the replayed data: {e}"); return
+
+    # --- REBUILD THE SUMMARY FROM THE NEW SCORES ---
+    spreadsheet = g_client.open(config.GOOGLE_SHEET_NAME)
+    scores_df = cleanup_sheets.get_sheet_as_df(spreadsheet, "Accessibility_Scores", skiprows=0, columns=[
+        'Main_Website', 'Sub_Page', 'Ind_Compliance_Lvl',
+        'Total_Violation', 'Severe_Violation', 'Moderate_Violation', 'Mild_Violation'
+    ])
+    registry_df = cleanup_sheets.get_sheet_as_df(spreadsheet, "Master_Website_Registry", skiprows=2,
+                                                 columns=['Website_URL (Home/Main)', 'Website_Name'])
+    if scores_df is None or registry_df is None or scores_df.empty or registry_df.empty:
+        print("Could not reload the scores or registry; 'Data_Cleanup' was not rebuilt.")
+    else:
+        cleanup_df = cleanup_sheets.build_cleanup_df(scores_df, registry_df)
+        if cleanup_df is not None:
+            cleanup_sheets.write_cleanup_sheet(spreadsheet, cleanup_df)
+
+    print(f"\nReplay complete in {time.perf_counter() - start:.1f}s.")
+    if failed_pages:
+        print("\nThe following stored results could not be processed:")
+        for url in failed_pages:
+            print(f"- {url}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+import heapq
+import json
+import os
+import threading
+from collections import deque
+from urllib.parse import urlparse
+import config
+
+def get_domain(url):
+    """Returns the host of a URL without a leading 'www.', for grouping pages by site."""
+    if not url.startswith(('http://', 'https://')):
+        url = 'https://' + url
+    domain = urlparse(url).netloc.lower()
+    return domain[4:] if domain.startswith('www.') else domain
+
+def is_homepage(page_url, base_url):
+    """Returns True if the page is the site's main page rather than a subpage."""
+    if page_url.rstrip('/') == base_url.rstrip('/'):
+        return True
+    if not page_url.startswith(('http://', 'https://')):
+        page_url = 'https://' + page_url
+    parsed = urlparse(page_url)
+    return parsed.path in ('', '/') and not parsed.query
+
+class DomainStats:
+    """
+    Per-domain history of how long pages took to analyze and how often they
+    failed, kept in DOMAIN_STATS_FILE between runs. Safe to update from worker threads.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or config.DOMAIN_STATS_FILE
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def load(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                self._stats = json.load(f)
+        except FileNotFoundError:
+            self._stats = {}
+        except Exception as e:
+            print(f"Warning: Could not read domain stats, starting without history. Error: {e}")
+            self._stats = {}
+        return self
+
+    def save(self):
+        """Writes the stats atomically so an interrupted run can't corrupt them."""
+        with self._lock:
+            data = json.dumps(self._stats)
+        tmp_path = self.path + '.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(data)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"Warning: Could not save domain stats. Error: {e}")
+
+    def record(self, url, seconds, ok):
+        """Records how long one page took (including retries) and whether it succeeded."""
+        with self._lock:
+            s = self._stats.setdefault(get_domain(url), {'ok': 0, 'ok_seconds': 0.0, 'failed': 0, 'failed_seconds': 0.0})
+            if ok:
+                s['ok'] += 1
+                s['ok_seconds'] += seconds
+            else:
+                s['failed'] += 1
+                s['failed_seconds'] += seconds
+
+    def expected_cost(self, url):
+        """
+        Expected seconds to process a page of this domain: the average time of
+        a successful page and of a failed one, weighted by the failure rate.
+        Domains without history get DEFAULT_PAGE_SECONDS.
+        """
+        with self._lock:
+            s = self._stats.get(get_domain(url))
+        if not s or s['ok'] + s['failed'] == 0:
+            return config.DEFAULT_PAGE_SECONDS
+        failure_rate = s['failed'] / (s['ok'] + s['failed'])
+        # An average with no samples gets zero weight, so 0.0 is only a placeholder.
+        ok_seconds = s['ok_seconds'] / s['ok'] if s['ok'] else 0.0
+        failed_seconds = s['failed_seconds'] / s['failed'] if s['failed'] else 0.0
+        return (1 - failure_rate) * ok_seconds + failure_rate * failed_seconds
+
+def _interleave_by_cost(items, stats, spread):
+    """
+    Orders (page_url, base_url) pairs longest-expected-first, while never placing
+    a domain within `spread` positions of its previous page when another domain
+    is available.
+    """
+    by_domain = {}
+    for page_url, base_url in items:
+        by_domain.setdefault(get_domain(page_url), []).append((stats.expected_cost(page_url), page_url, base_url))
+    for queue in by_domain.values():
+        queue.sort()  # cheapest first, so pop() yields the most expensive
+
+    heap = [(-queue[-1][0], domain) for domain, queue in by_domain.items()]
+    heapq.heapify(heap)
+    recent = deque(maxlen=max(spread - 1, 0))
+    ordered = []
+    while heap:
+        held = []
+        while heap and heap[0][1] in recent:
+            held.append(heapq.heappop(heap))
+        # If every remaining domain was used recently, take the most expensive anyway.
+        _, domain = heapq.heappop(heap) if heap else held.pop(0)
+        for entry in held:
+            heapq.heappush(heap, entry)
+
+        _, page_url, base_url = by_domain[domain].pop()
+        ordered.append((page_url, base_url))
+        recent.append(domain)
+        if by_domain[domain]:
+            heapq.heappush(heap, (-by_domain[domain][-1][0], domain))
+    return ordered
+
+def order_pages(pages, stats, spread=None):
+    """
+    Turns a {page_url: base_url} map into the order pages should be submitted in.
+    Homepages go first so every site has a partial result early; the remaining
+    subpages follow longest-processing-time-first, interleaved across domains
+    so parallel workers don't pile onto the same host.
+    """
+    spread = spread or config.NUM_WORKERS
+    homepages = [(url, base) for url, base in pages.items() if is_homepage(url, base)]
+    subpages = [(url, base) for url, base in pages.items() if not is_homepage(url, base)]
+    return _interleave_by_cost(homepages, stats, spread) + _interleave_by_cost(subpages, stats, spread)
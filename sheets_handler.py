@@ -37,6 +37,47 @@ def append_violation_details(client, details_rows):
         print(f"  !! CRITICAL: Failed to save violation details batch. Error: {e}")
         raise
 
+def read_columns(spreadsheet, sheet_name, column_names, header_row=1):
+    """
+    Reads only the named columns of a worksheet, using one `values_batch_get`
+    call per chunk of SHEETS_CHUNK_ROWS rows instead of downloading every column.
+    Returns a dict of {column_name: [values]} with all lists padded to the same
+    length, so index i is the (i + 1)-th data row below the header.
+    Columns missing from the header are left out of the result.
+    """
+    sheet = spreadsheet.worksheet(sheet_name)
+    header = [h.strip() for h in sheet.row_values(header_row)]
+    letters = {}
+    for name in column_names:
+        if name in header:
+            col_index = header.index(name) + 1
+            letters[name] = gspread.utils.rowcol_to_a1(1, col_index).rstrip('1')
+    columns = {name: [] for name in letters}
+    if not letters:
+        return columns
+
+    quoted_title = "'" + sheet.title.replace("'", "''") + "'"
+    start = header_row + 1
+    while start <= sheet.row_count:
+        end = min(start + config.SHEETS_CHUNK_ROWS - 1, sheet.row_count)
+        ranges = [f"{quoted_title}!{letter}{start}:{letter}{end}" for letter in letters.values()]
+        response = spreadsheet.values_batch_get(ranges, params={'majorDimension': 'COLUMNS'})
+        chunk = []
+        for value_range in response.get('valueRanges', []):
+            values = value_range.get('values', [])
+            chunk.append(values[0] if values else [])
+        # The API trims trailing blanks per column; pad every chunk to its full
+        # height so rows stay aligned across chunks.
+        for name, values in zip(letters, chunk):
+            columns[name].extend(values + [''] * (end - start + 1 - len(values)))
+        start = end + 1
+
+    # Drop the blank rows at the bottom of the grid.
+    length = max((i + 1 for values in columns.values() for i, v in enumerate(values) if v != ''), default=0)
+    for name in columns:
+        del columns[name][length:]
+    return columns
+
 def get_scored_pages_map(client):
     """
     Reads 'Accessibility_Scores' and returns a dictionary of {sub_page: main_website}
@@ -44,11 +85,9 @@ def get_scored_pages_map(client):
     """
     pages_map = {}
     try:
-        sheet = client.open(config.GOOGLE_SHEET_NAME).worksheet("Accessibility_Scores")
-        records = sheet.get_all_records()
-        for record in records:
-            sub_page = record.get('Sub_Page')
-            main_site = record.get('Main_Website')
+        spreadsheet = client.open(config.GOOGLE_SHEET_NAME)
+        columns = read_columns(spreadsheet, "Accessibility_Scores", ['Sub_Page', 'Main_Website'])
+        for sub_page, main_site in zip(columns.get('Sub_Page', []), columns.get('Main_Website', [])):
             if sub_page and main_site:
                 pages_map[sub_page] = main_site
         return pages_map
@@ -70,4 +109,128 @@ def get_detailed_pages_set(client):
         return pages_set
     except Exception as e:
         print(f"Warning: Could not read 'Violation_Details' sheet. Error: {e}")
-        return set()
\ No newline at end of file
+        return set()
+
+def setup_diff_sheets(client):
+    """Ensures the sheets used by differential re-audits exist with a header."""
+    headers = {
+        config.CHANGES_SHEET_NAME: ['Main_Website', 'Sub_Page', 'Violation_ID', 'Change', 'Severity',
+                                    'Previous_Severity', 'Description', 'Help_URL', 'Audited_At'],
+        config.TRENDS_SHEET_NAME: ['Main_Website', 'Pages_Audited', 'Pages_Changed', 'New_Violations',
+                                   'Fixed_Violations', 'Changed_Violations', 'Open_Violations', 'Net_Change', 'Audited_At'],
+    }
+    try:
+        sheet = client.open(config.GOOGLE_SHEET_NAME)
+        for title, header in headers.items():
+            try:
+                sheet.worksheet(title)
+            except gspread.exceptions.WorksheetNotFound:
+                print(f"Creating new '{title}' sheet...")
+                new_sheet = sheet.add_worksheet(title=title, rows="1", cols=len(header))
+                new_sheet.append_rows([header])
+    except Exception as e:
+        print(f"Failed to setup re-audit sheets: {e}")
+
+def append_violation_changes(client, change_rows):
+    """Appends a batch of change rows to the violation changes sheet."""
+    if not change_rows:
+        return
+    try:
+        sheet = client.open(config.GOOGLE_SHEET_NAME).worksheet(config.CHANGES_SHEET_NAME)
+        sheet.append_rows(change_rows, value_input_option='USER_ENTERED')
+    except Exception as e:
+        print(f"  !! CRITICAL: Failed to save violation changes batch. Error: {e}")
+        raise
+
+def append_site_trends(client, trend_rows):
+    """Appends the per-site trend summary of a re-audit run."""
+    if not trend_rows:
+        return
+    try:
+        sheet = client.open(config.GOOGLE_SHEET_NAME).worksheet(config.TRENDS_SHEET_NAME)
+        sheet.append_rows(trend_rows, value_input_option='USER_ENTERED')
+    except Exception as e:
+        print(f"  !! CRITICAL: Failed to save site trends. Error: {e}")
+        raise
+
+def get_last_violation_sets(client):
+    """
+    Rebuilds the most recent known violations of every page as
+    {sub_page: {violation_id: severity}}.
+    'Violation_Details' is the baseline; the changes recorded by re-audits are
+    then replayed on top of it in the order they were written.
+    Returns (violation_sets, baselined_pages), where baselined_pages holds every
+    page with detail rows or change/marker rows. A page outside that set has no
+    stored result yet, which is not the same as having zero violations.
+    Returns None if the stored results could not be read, since diffing
+    against a partial history would report changes that never happened.
+    """
+    violation_sets = {}
+    baselined_pages = set()
+    try:
+        spreadsheet = client.open(config.GOOGLE_SHEET_NAME)
+        details = read_columns(spreadsheet, "Violation_Details", ['Sub_Page', 'Violation_ID', 'Severity'])
+        for sub_page, violation_id, severity in zip(details.get('Sub_Page', []), details.get('Violation_ID', []),
+                                                    details.get('Severity', [])):
+            if sub_page and violation_id:
+                violation_sets.setdefault(sub_page, {})[violation_id] = severity
+                baselined_pages.add(sub_page)
+    except Exception as e:
+        print(f"Error reading 'Violation_Details' sheet: {e}")
+        return None
+
+    try:
+        changes = read_columns(spreadsheet, config.CHANGES_SHEET_NAME, ['Sub_Page', 'Violation_ID', 'Change', 'Severity'])
+    except gspread.exceptions.WorksheetNotFound:
+        return violation_sets, baselined_pages
+    except Exception as e:
+        print(f"Error reading '{config.CHANGES_SHEET_NAME}' sheet: {e}")
+        return None
+    for sub_page, violation_id, change, severity in zip(changes.get('Sub_Page', []), changes.get('Violation_ID', []),
+                                                        changes.get('Change', []), changes.get('Severity', [])):
+        if not sub_page:
+            continue
+        baselined_pages.add(sub_page)
+        page_set = violation_sets.setdefault(sub_page, {})
+        if change in ('new', 'changed'):
+            page_set[violation_id] = severity
+        elif change == 'fixed':
+            page_set.pop(violation_id, None)
+    return violation_sets, baselined_pages
+
+
+def rewrite_page_sheet(client, sheet_name, default_header, rows, replaced_pages):
+    """
+    Rewrites a per-page sheet (Sub_Page in column B) so that every page in
+    `replaced_pages` is represented only by `rows`; rows of all other pages are
+    kept. The existing header is kept if there is one.
+    Rows are written top-down in chunks of SHEETS_CHUNK_ROWS, so an interrupted
+    write can leave leftover old rows at the bottom but never loses kept rows.
+    Returns the number of rows kept.
+    """
+    spreadsheet = client.open(config.GOOGLE_SHEET_NAME)
+    try:
+        sheet = spreadsheet.worksheet(sheet_name)
+        existing = sheet.get_all_values()
+    except gspread.exceptions.WorksheetNotFound:
+        print(f"Creating new '{sheet_name}' sheet...")
+        sheet = spreadsheet.add_worksheet(title=sheet_name, rows="1", cols=len(default_header))
+        existing = []
+
+    header = existing[0] if existing else default_header
+    kept = [row for row in existing[1:] if any(row) and (len(row) < 2 or row[1] not in replaced_pages)]
+    all_rows = [header] + kept + rows
+
+    width = max(len(row) for row in all_rows)
+    if len(all_rows) > sheet.row_count:
+        sheet.add_rows(len(all_rows) - sheet.row_count)
+    if width > sheet.col_count:
+        sheet.add_cols(width - sheet.col_count)
+    for start in range(0, len(all_rows), config.SHEETS_CHUNK_ROWS):
+        chunk = all_rows[start:start + config.SHEETS_CHUNK_ROWS]
+        sheet.update(values=chunk, range_name=f"A{start + 1}", value_input_option='USER_ENTERED')
+    if len(existing) > len(all_rows):
+        old_width = max(len(row) for row in existing)
+        last_cell = gspread.utils.rowcol_to_a1(len(existing), old_width)
+        sheet.batch_clear([f"A{len(all_rows) + 1}:{last_cell}"])
+    return len(kept)